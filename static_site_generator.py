@@ -4,140 +4,245 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from datetime import datetime
 import sys
-from typing import Set, Dict
+from typing import Set, Dict, List, Tuple, Optional
 import hashlib
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from static_site_generator_machine import Preprocessor  # importing from your previous script
 
 class BuildEvent:
     """Represents a build event with debouncing support"""
     def __init__(self):
         self.last_trigger = 0
-        self.is_building = False
-        self.needs_rebuild = False
+        self.pending = False
+        self.forced = False  # a build was requested directly, not by file events
+        self.pending_changes: Dict[str, Tuple[str, Optional[str]]] = {}
         self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
 
 class FileChangeHandler(FileSystemEventHandler):
     def __init__(self, source_dir: str, build_dir: str, debounce_seconds: float = 0.5):
         self.source_dir = os.path.abspath(source_dir)
         self.build_dir = os.path.abspath(build_dir)
+        self._build_prefix = self.build_dir + os.sep
+        self._ignore_suffixes = ('.py', '.pyc')
         self.debounce_seconds = debounce_seconds
         self.build_event = BuildEvent()
-        self.file_hashes: Dict[str, str] = {}
+        self.file_hashes: Dict[str, Tuple[int, int, Optional[str]]] = {}
         self.preprocessor = Preprocessor()
         
         # Initialize file hashes
         self._update_file_hashes()
         
+        # Start the long-lived builder thread
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        
     def _update_file_hashes(self) -> None:
-        """Update the hash of all files in the source directory"""
-        new_hashes = {}
+        """Update the cached state of all files in the source directory"""
+        paths = []
         for root, _, files in os.walk(self.source_dir):
-            if self.build_dir in root:
+            if self._in_build_dir(root):
                 continue
             for file in files:
                 if file.endswith('.py'):  # Skip Python files
                     continue
-                filepath = os.path.join(root, file)
-                try:
-                    with open(filepath, 'rb') as f:
-                        content = f.read()
-                        new_hashes[filepath] = hashlib.md5(content).hexdigest()
-                except Exception as e:
-                    print(f"Error hashing file {filepath}: {e}")
-        self.file_hashes = new_hashes
+                paths.append(os.path.join(root, file))
+
+        # Workers only return results, the dict is assembled on this thread
+        self.file_hashes = {}
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for filepath, state in executor.map(self._hash_one, paths):
+                if state is not None:
+                    self.file_hashes[filepath] = state
+
+    def _hash_one(self, filepath: str) -> Tuple[str, Optional[Tuple[int, int, Optional[str]]]]:
+        """Compute the state of a file for the startup scan"""
+        try:
+            return filepath, self._digest(filepath)
+        except FileNotFoundError:
+            return filepath, None
+        except Exception as e:
+            print(f"Error hashing file {filepath}: {e}")
+            return filepath, None
+
+    def _update_file_hash(self, filepath: str) -> None:
+        """Update the cached state of a single file"""
+        try:
+            self.file_hashes[filepath] = self._digest(filepath)
+        except FileNotFoundError:
+            self._forget_file(filepath)
+        except Exception as e:
+            print(f"Error hashing file {filepath}: {e}")
+
+    def _forget_file(self, filepath: str) -> None:
+        """Drop the cached state of a file that no longer exists"""
+        self.file_hashes.pop(filepath, None)
+
+    def _digest(self, filepath: str) -> Tuple[int, int, Optional[str]]:
+        """
+        Return the (mtime_ns, size, content hash) state of a file.
+        The content hash is only computed for racily-clean files, i.e. files
+        written within the filesystem's mtime resolution (up to 2s), which can
+        change again without moving their mtime. Everything else is keyed on stat alone.
+        """
+        st = os.stat(filepath)
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self.file_hashes.get(filepath)
+        racy = st.st_mtime_ns >= time.time_ns() - 2_000_000_000
+        if racy or (cached is not None and cached[2] is not None and cached[:2] == key):
+            return (*key, self._hash_file(filepath))
+        return (*key, None)
+
+    def _hash_file(self, filepath: str) -> str:
+        """Hash the contents of a file, streaming it in 1MB chunks"""
+        hasher = hashlib.blake2b()
+        buffer = memoryview(bytearray(1 << 20))
+        with open(filepath, 'rb') as f:
+            while n := f.readinto(buffer):
+                hasher.update(buffer[:n])
+        return hasher.hexdigest()
 
     def _has_file_changed(self, filepath: str) -> bool:
-        """Check if a file has actually changed by comparing its hash"""
+        """Check if a file has actually changed and cache its current state"""
         try:
-            with open(filepath, 'rb') as f:
-                content = f.read()
-                new_hash = hashlib.md5(content).hexdigest()
-                old_hash = self.file_hashes.get(filepath)
-                return new_hash != old_hash
+            state = self._digest(filepath)
         except Exception:
             return True  # If we can't read the file, assume it changed
+        cached = self.file_hashes.get(filepath)
+        self.file_hashes[filepath] = state
+        if cached is None or state[:2] != cached[:2]:
+            return True
+        # Stat is unchanged; only a racily-clean file can still differ in content
+        return cached[2] is not None and state[2] != cached[2]
+
+    def _in_build_dir(self, path: str) -> bool:
+        """Check if a path is the build directory or inside it"""
+        return path.startswith(self._build_prefix) or path == self.build_dir
 
     def _should_ignore(self, filepath: str) -> bool:
         """Check if the file should be ignored"""
         # Ignore build directory and Python files
-        return (self.build_dir in filepath or 
-                filepath.endswith('.py') or 
-                filepath.endswith('.pyc') or
+        return (filepath.endswith(self._ignore_suffixes) or
+                self._in_build_dir(filepath) or
                 '__pycache__' in filepath or
                 '.git' in filepath)
 
-    def _trigger_build(self) -> None:
-        """Trigger a build with debouncing"""
+    def _handle(self, kind: str, event) -> None:
+        """Queue a file event for the next build batch, keeping only the latest event per path"""
+        if event.is_directory or self._should_ignore(event.src_path):
+            return
+        
+        dest_path = event.dest_path if kind == 'moved' else None
+        with self.build_event.condition:
+            self.build_event.pending_changes[event.src_path] = (kind, dest_path)
+            self.build_event.pending = True
+            self.build_event.condition.notify()
+
+    def _take_changes(self) -> Tuple[Dict[str, Tuple[str, Optional[str]]], bool]:
+        """
+        Take all queued file events and whether a build was forced, clearing the
+        pending request in the same critical section so no event is counted twice
+        """
         with self.build_event.lock:
-            current_time = time.time()
-            
-            # If we're currently building, mark for rebuild
-            if self.build_event.is_building:
-                self.build_event.needs_rebuild = True
-                return
-            
-            # Check if we need to debounce
-            if current_time - self.build_event.last_trigger < self.debounce_seconds:
-                self.build_event.needs_rebuild = True
-                return
+            changes = self.build_event.pending_changes
+            forced = self.build_event.forced
+            self.build_event.pending_changes = {}
+            self.build_event.forced = False
+            self.build_event.pending = False
+            self.build_event.last_trigger = time.time()
+        return changes, forced
+
+    def _apply_changes(self, changes: Dict[str, Tuple[str, Optional[str]]]) -> bool:
+        """Update cached file state for a batch of events, returning whether anything changed"""
+        applied = []
+        for path, (kind, dest_path) in changes.items():
+            if kind == 'modified':
+                if not self._has_file_changed(path):
+                    continue
+            elif kind == 'created':
+                self._update_file_hash(path)
+            elif kind == 'deleted':
+                self._forget_file(path)
+            elif kind == 'moved':
+                self._forget_file(path)
+                self._update_file_hash(dest_path)
+            applied.append((kind, path, dest_path))
+        
+        if applied:
+            self._print_changes(applied)
+        return bool(applied)
+
+    def _print_changes(self, applied: List[Tuple[str, str, Optional[str]]], limit: int = 10) -> None:
+        """Print one summary of a batch of changes, listing at most `limit` files"""
+        labels = {'modified': 'changed', 'created': 'created', 'deleted': 'deleted', 'moved': 'moved/renamed'}
+        lines = [f"\n{len(applied)} file(s) changed:" if len(applied) > 1 else ""]
+        for kind, path, dest_path in applied[:limit]:
+            line = f"File {labels[kind]}: {os.path.relpath(path, self.source_dir)}"
+            if dest_path is not None:
+                line += f" -> {os.path.relpath(dest_path, self.source_dir)}"
+            lines.append(line)
+        if len(applied) > limit:
+            lines.append(f"... and {len(applied) - limit} more")
+        print("\n".join(lines))
+
+    def _trigger_build(self) -> None:
+        """Request a build from the builder thread"""
+        with self.build_event.condition:
+            self.build_event.forced = True
+            self.build_event.pending = True
+            self.build_event.condition.notify()
+
+    def _run(self) -> None:
+        """
+        Builder thread loop. The first request after a quiet period builds
+        immediately; requests arriving within debounce_seconds of the previous
+        build are collected and built once when the window closes.
+        """
+        while True:
+            with self.build_event.condition:
+                self.build_event.condition.wait_for(lambda: self.build_event.pending)
+                wait = self.build_event.last_trigger + self.debounce_seconds - time.time()
             
-            self.build_event.is_building = True
-            self.build_event.last_trigger = current_time
+            # Let the rest of the burst collect before building
+            if wait > 0:
+                time.sleep(wait)
             
-        self._execute_build()
+            changes, forced = self._take_changes()
+            self._execute_build(changes, forced)
 
-    def _execute_build(self) -> None:
+    def _execute_build(self, changes: Dict[str, Tuple[str, Optional[str]]], forced: bool = False) -> None:
         """Execute the build process"""
         try:
+            if not self._apply_changes(changes) and not forced:
+                # Only no-op events (e.g. saves without edits), so nothing was
+                # built and the next real change need not wait out the window
+                with self.build_event.lock:
+                    self.build_event.last_trigger = 0
+                return
+            
             print("\n" + "="*50)
             print(f"Building site at {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
             print("="*50)
             
             self.preprocessor.generate_site(self.source_dir)
-            self._update_file_hashes()
             
             print(f"Build completed successfully!")
             
         except Exception as e:
             print(f"Build failed: {str(e)}")
-            
-        finally:
-            with self.build_event.lock:
-                self.build_event.is_building = False
-                if self.build_event.needs_rebuild:
-                    self.build_event.needs_rebuild = False
-                    # Trigger another build if changes occurred during build
-                    threading.Thread(target=self._trigger_build).start()
 
     def on_modified(self, event):
-        if event.is_directory or self._should_ignore(event.src_path):
-            return
-            
-        if self._has_file_changed(event.src_path):
-            print(f"\nFile changed: {os.path.relpath(event.src_path, self.source_dir)}")
-            self._trigger_build()
+        self._handle('modified', event)
 
     def on_created(self, event):
-        if event.is_directory or self._should_ignore(event.src_path):
-            return
-            
-        print(f"\nFile created: {os.path.relpath(event.src_path, self.source_dir)}")
-        self._trigger_build()
+        self._handle('created', event)
 
     def on_deleted(self, event):
-        if event.is_directory or self._should_ignore(event.src_path):
-            return
-            
-        print(f"\nFile deleted: {os.path.relpath(event.src_path, self.source_dir)}")
-        self._trigger_build()
+        self._handle('deleted', event)
 
     def on_moved(self, event):
-        if event.is_directory or self._should_ignore(event.src_path):
-            return
-            
-        print(f"\nFile moved/renamed: {os.path.relpath(event.src_path, self.source_dir)} -> {os.path.relpath(event.dest_path, self.source_dir)}")
-        self._trigger_build()
+        self._handle('moved', event)
 
 class SiteWatcher:
     def __init__(self, source_dir: str = ".", build_dir: str = "build"):
@@ -169,12 +274,14 @@ class SiteWatcher:
             print("\nStopping watcher...")
             self.observer.stop()
             self.observer.join()
+            event_handler.preprocessor.close()
             print("Watcher stopped.")
             
         except Exception as e:
             print(f"Error: {str(e)}")
             self.observer.stop()
             self.observer.join()
+            event_handler.preprocessor.close()
             sys.exit(1)
 
 def main():
@@ -1,8 +1,12 @@
 import os
 import re
 import shutil
-from typing import Dict, Set, List, Optional
-from dataclasses import dataclass
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Set, List, Optional, Tuple, Union, cast
+from dataclasses import dataclass, field
 from enum import Enum, auto
 
 class PreprocessorError(Exception):
@@ -18,10 +22,13 @@ class TokenType(Enum):
     UNDEF = auto()
     TEXT = auto()
 
+# (name, params, body) carried by DEFINE tokens; every other token carries a str
+MacroDefinition = Tuple[str, List[str], str]
+
 @dataclass
 class Token:
     type: TokenType
-    value: str
+    value: Union[str, MacroDefinition]
     line_number: int
     file: str
 
@@ -32,14 +39,68 @@ class Macro:
     body: str
     file: str
     line: int
+    template: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Compile the body once into a str.format template: literal braces are
+        # doubled and each {param} becomes a positional field, so expansion is
+        # a single C-level pass instead of one regex substitution per parameter
+        slots: Dict[str, int] = {}
+        for index, param in enumerate(self.params):
+            slots.setdefault(param, index)
+        if not slots:
+            self.template = self.body.replace('{', '{{').replace('}', '}}')
+            return
+        
+        param_re = re.compile(r'\{(' + '|'.join(re.escape(p) for p in slots) + r')\}')
+        parts = []
+        pos = 0
+        for match in param_re.finditer(self.body):
+            parts.append(self.body[pos:match.start()].replace('{', '{{').replace('}', '}}'))
+            parts.append(f'{{{slots[match.group(1)]}}}')
+            pos = match.end()
+        parts.append(self.body[pos:].replace('{', '{{').replace('}', '}}'))
+        self.template = ''.join(parts)
+
+@dataclass
+class CachedRender:
+    macros_key: str  # digest of the shared macro table the page was rendered with
+    dependencies: Dict[str, str]  # digest of every source file read by the render
+    output: str
+    build_state: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the build file once written
+
+@dataclass
+class CachedMacros:
+    pages: List[str]
+    dependencies: Dict[str, str]  # digest of every source file read while collecting
+    macros: Dict[str, Macro]
 
 class Preprocessor:
-    def __init__(self):
+    _RE_INCLUDE = re.compile(r'#include\s*[<"](.+)[>"]')
+    _RE_DEFINE = re.compile(r'#define\s+(\w+)(?:\(([\w\s,]*)\))?\s*\(')
+    _RE_IFDEF = re.compile(r'#ifdef\s+(\w+)')
+    _RE_IFNDEF = re.compile(r'#ifndef\s+(\w+)')
+    _RE_UNDEF = re.compile(r'#undef\s+(\w+)')
+    _RE_CALL_START = re.compile(r'(\w+)\s*\(')
+    _RE_ARG_DELIMITER = re.compile(r'[(),]')
+
+    def __init__(self) -> None:
         self.build_dir = "build"
         self.include_stack: List[str] = []
+        self.expanding: List[str] = []
         self.macros: Dict[str, Macro] = {}
         self.defined_symbols: Set[str] = set()
-        self.conditional_stack: List[bool] = []
+        # Bit i holds whether the i-th enclosing #if branch is taken
+        self.conditional_mask = 0
+        self.conditional_depth = 0
+        # Digest of every source file read by the last process_file call
+        self.dependencies: Dict[str, str] = {}
+        self._macro_call_re: Optional[re.Pattern[str]] = None
+        self._render_cache: Dict[str, CachedRender] = {}
+        self._site_macros: Optional[CachedMacros] = None
+        self._sources: Dict[str, str] = {}
+        self._source_digests: Dict[str, str] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
 
     def collect_macro_body(self, lines: List[str], start_idx: int) -> tuple[str, int]:
         """Collects a macro body between parentheses."""
@@ -49,12 +110,7 @@ class Preprocessor:
         
         while i < len(lines):
             line = lines[i].rstrip()
-            
-            for char in line:
-                if char == '(':
-                    paren_count += 1
-                elif char == ')':
-                    paren_count -= 1
+            paren_count += line.count('(') - line.count(')')
             
             if paren_count > 0:
                 body.append(line)
@@ -81,33 +137,38 @@ class Preprocessor:
                 continue
                 
             if line.startswith('#include'):
-                match = re.match(r'#include\s*[<"](.+)[>"]', line)
+                match = self._RE_INCLUDE.match(line)
                 if match:
                     tokens.append(Token(TokenType.INCLUDE, match.group(1), i + 1, filename))
                 i += 1
                 continue
             
             if line.startswith('#define'):
-                match = re.match(r'#define\s+(\w+)(?:\(([\w\s,]*)\))?\s*\(', line)
+                match = self._RE_DEFINE.match(line)
                 if match:
                     name, params = match.groups()
                     params = [p.strip() for p in params.split(',')] if params else []
                     
                     # Collect the macro body until matching closing parenthesis
                     body, end_line = self.collect_macro_body(lines, i)
+                    # Drop the "#define name(params) (" header so only the contents remain
+                    header_end = len(lines[i]) - len(lines[i].lstrip()) + match.end()
+                    body = body[header_end:]
+                    if body.startswith('\n'):
+                        body = body[1:]
                     tokens.append(Token(TokenType.DEFINE, (name, params, body), i + 1, filename))
                     i = end_line + 1
                     continue
             
             if line.startswith('#ifdef'):
-                match = re.match(r'#ifdef\s+(\w+)', line)
+                match = self._RE_IFDEF.match(line)
                 if match:
                     tokens.append(Token(TokenType.IFDEF, match.group(1), i + 1, filename))
                 i += 1
                 continue
                 
             if line.startswith('#ifndef'):
-                match = re.match(r'#ifndef\s+(\w+)', line)
+                match = self._RE_IFNDEF.match(line)
                 if match:
                     tokens.append(Token(TokenType.IFNDEF, match.group(1), i + 1, filename))
                 i += 1
@@ -124,20 +185,21 @@ class Preprocessor:
                 continue
                 
             if line.startswith('#undef'):
-                match = re.match(r'#undef\s+(\w+)', line)
+                match = self._RE_UNDEF.match(line)
                 if match:
                     tokens.append(Token(TokenType.UNDEF, match.group(1), i + 1, filename))
                 i += 1
                 continue
             
             # Handle text with possible macro calls
-            if '(' in line:
+            if line.count('(') > line.count(')'):
                 # Check if this is the start of a multi-line macro call
-                match = re.match(r'(\w+)\s*\(', line)
+                match = self._RE_CALL_START.match(line)
                 if match and match.group(1) in self.macros:
-                    body, end_line = self.collect_macro_body(lines[i:], 0)
-                    tokens.append(Token(TokenType.TEXT, f"{match.group(1)}({body})", i + 1, filename))
-                    i += end_line + 1
+                    body, end_line = self.collect_macro_body(lines, i)
+                    # The body already starts with "name(", only the closing paren is missing
+                    tokens.append(Token(TokenType.TEXT, body + ')', i + 1, filename))
+                    i = end_line + 1
                     continue
             
             tokens.append(Token(TokenType.TEXT, line, i + 1, filename))
@@ -154,23 +216,27 @@ class Preprocessor:
         
         for line in lines:
             line = line.strip()
+            start = 0
             
-            for char in line:
+            # Jump between delimiters instead of visiting every character
+            for match in self._RE_ARG_DELIMITER.finditer(line):
+                char = match.group()
                 if char == '(':
                     paren_count += 1
-                    current_arg.append(char)
                 elif char == ')':
                     paren_count -= 1
-                    current_arg.append(char)
-                elif char == ',' and paren_count == 0:
-                    if current_arg:
-                        args.append(''.join(current_arg).strip())
-                        current_arg = []
-                else:
-                    current_arg.append(char)
+                elif paren_count == 0:
+                    current_arg.append(line[start:match.start()])
+                    start = match.end()
+                    arg = ''.join(current_arg)
+                    if arg:
+                        args.append(arg.strip())
+                    current_arg = []
+            current_arg.append(line[start:])
         
-        if current_arg:
-            args.append(''.join(current_arg).strip())
+        arg = ''.join(current_arg)
+        if arg:
+            args.append(arg.strip())
         
         return [arg.strip() for arg in args if arg.strip()]
 
@@ -185,12 +251,7 @@ class Preprocessor:
                 f"but got {len(args)} in file {macro.file} at line {macro.line}"
             )
         
-        result = macro.body
-        for param, arg in zip(macro.params, args):
-            # Only replace parameters that are enclosed in curly braces
-            pattern = r'\{' + re.escape(param) + r'\}'
-            result = re.sub(pattern, arg, result)
-        return result
+        return macro.template.format(*args)
 
     def process_tokens(self, tokens: List[Token], base_dir: str) -> str:
         # First pass: collect all macro definitions
@@ -203,7 +264,8 @@ class Preprocessor:
         while i < len(tokens):
             token = tokens[i]
             
-            if self.conditional_stack and not self.conditional_stack[-1]:
+            # Inside a skipped branch unless every enclosing branch bit is set
+            if self.conditional_mask != (1 << self.conditional_depth) - 1:
                 if token.type in {TokenType.ENDIF, TokenType.ELSE}:
                     self.handle_conditional_directive(token)
                 i += 1
@@ -216,9 +278,11 @@ class Preprocessor:
             elif token.type in {TokenType.IFDEF, TokenType.IFNDEF, TokenType.ELSE, TokenType.ENDIF}:
                 self.handle_conditional_directive(token)
             elif token.type == TokenType.UNDEF:
-                if token.value in self.macros:
-                    del self.macros[token.value]
-                self.defined_symbols.discard(token.value)
+                name = cast(str, token.value)
+                if name in self.macros:
+                    del self.macros[name]
+                    self._macro_call_re = None
+                self.defined_symbols.discard(name)
             
             i += 1
         
@@ -227,15 +291,16 @@ class Preprocessor:
     def collect_macros(self, tokens: List[Token], base_dir: str) -> None:
         for token in tokens:
             if token.type == TokenType.DEFINE:
-                name, params, body = token.value
+                name, params, body = cast(MacroDefinition, token.value)
                 self.macros[name] = Macro(name, params, body, token.file, token.line_number)
+                self._macro_call_re = None
                 self.defined_symbols.add(name)
             elif token.type == TokenType.INCLUDE:
                 self.process_include_macros(token, base_dir)
 
     def process_include_macros(self, token: Token, base_dir: str) -> None:
         include_path = os.path.normpath(
-            os.path.join(os.path.dirname(token.file), token.value)
+            os.path.join(os.path.dirname(token.file), cast(str, token.value))
         )
         
         if include_path in self.include_stack:
@@ -246,8 +311,7 @@ class Preprocessor:
         
         self.include_stack.append(include_path)
         try:
-            with open(include_path, 'r', encoding='utf-8') as f:
-                included_content = f.read()
+            included_content = self.read_source(include_path)
             included_tokens = self.tokenize(included_content, include_path)
             self.collect_macros(included_tokens, base_dir)
         finally:
@@ -255,80 +319,319 @@ class Preprocessor:
 
     def process_include(self, token: Token, base_dir: str) -> str:
         include_path = os.path.normpath(
-            os.path.join(os.path.dirname(token.file), token.value)
+            os.path.join(os.path.dirname(token.file), cast(str, token.value))
         )
         
         self.include_stack.append(include_path)
         try:
-            with open(include_path, 'r', encoding='utf-8') as f:
-                included_content = f.read()
+            included_content = self.read_source(include_path)
             included_tokens = self.tokenize(included_content, include_path)
             return self.process_tokens(included_tokens, base_dir)
         finally:
             self.include_stack.pop()
 
+    def get_macro_call_re(self) -> Optional[re.Pattern[str]]:
+        """Returns one regex matching a call to any defined macro, rebuilt only when macros change."""
+        if self._macro_call_re is None and self.macros:
+            names = '|'.join(re.escape(name) for name in self.macros)
+            self._macro_call_re = re.compile(
+                r'(?P<name>' + names + r')\s*\((?P<args>(?:[^()]|\([^()]*\))*)\)'
+            )
+        return self._macro_call_re
+
+    def expand_call(self, match: re.Match[str]) -> str:
+        """
+        Expands a single macro call matched by the combined macro call regex.
+        The expansion is scanned again so components can use other components.
+        As in C, a macro's name inside its own expansion is left as plain text.
+        """
+        name = match['name']
+        macro_call_re = cast(re.Pattern[str], self.get_macro_call_re())
+        if name in self.expanding:
+            # Other macros in its arguments are still expanded
+            head = match.string[match.start():match.start('args')]
+            return head + macro_call_re.sub(self.expand_call, match['args']) + ')'
+        
+        macro = self.macros[name]
+        args = self.parse_macro_args(match['args'])
+        expansion = self.expand_macro(macro, args)
+        
+        self.expanding.append(name)
+        try:
+            return macro_call_re.sub(self.expand_call, expansion)
+        finally:
+            self.expanding.pop()
+
     def process_text(self, token: Token) -> str:
-        line = token.value
-        for macro_name, macro in self.macros.items():
-            pattern = rf'{macro_name}\s*\(((?:[^()]*|\([^()]*\))*)\)'
-            match = re.search(pattern, line)
-            if match:
-                args = self.parse_macro_args(match.group(1))
-                expansion = self.expand_macro(macro, args)
-                line = line[:match.start()] + expansion + line[match.end():]
-        return line
-
-    def handle_conditional_directive(self, token: Token):
+        line = cast(str, token.value)
+        macro_call_re = self.get_macro_call_re()
+        if macro_call_re is None:
+            return line
+        # Expand every macro call in a single pass over the line
+        return macro_call_re.sub(self.expand_call, line)
+
+    def handle_conditional_directive(self, token: Token) -> None:
         if token.type == TokenType.IFDEF:
-            self.conditional_stack.append(token.value in self.defined_symbols)
+            taken = token.value in self.defined_symbols
+            self.conditional_mask |= taken << self.conditional_depth
+            self.conditional_depth += 1
         elif token.type == TokenType.IFNDEF:
-            self.conditional_stack.append(token.value not in self.defined_symbols)
+            taken = token.value not in self.defined_symbols
+            self.conditional_mask |= taken << self.conditional_depth
+            self.conditional_depth += 1
         elif token.type == TokenType.ELSE:
-            if not self.conditional_stack:
+            if not self.conditional_depth:
                 raise PreprocessorError("#else without matching #if")
-            self.conditional_stack[-1] = not self.conditional_stack[-1]
+            self.conditional_mask ^= 1 << (self.conditional_depth - 1)
         elif token.type == TokenType.ENDIF:
-            if not self.conditional_stack:
+            if not self.conditional_depth:
                 raise PreprocessorError("#endif without matching #if")
-            self.conditional_stack.pop()
+            self.conditional_depth -= 1
+            self.conditional_mask &= (1 << self.conditional_depth) - 1
 
-    def process_file(self, filepath: str, base_dir: str) -> str:
+    def read_source(self, filepath: str) -> str:
+        """
+        Reads a source file, recording its digest as a dependency of the current render.
+        Each file is read once per render, however many times it is included.
+        """
+        if filepath in self._sources:
+            return self._sources[filepath]
         with open(filepath, 'r', encoding='utf-8') as f:
             content = f.read()
+        digest = hashlib.blake2b(content.encode('utf-8')).hexdigest()
+        self._sources[filepath] = content
+        self.dependencies[filepath] = digest
+        self._source_digests[filepath] = digest
+        return content
+
+    def source_digest(self, filepath: str) -> Optional[str]:
+        """Returns the digest of a source file, reading it at most once per build."""
+        if filepath not in self._source_digests:
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError):
+                return None
+            self._source_digests[filepath] = hashlib.blake2b(content.encode('utf-8')).hexdigest()
+        return self._source_digests[filepath]
+
+    def load_macros(self, macros: Dict[str, Macro]) -> None:
+        """Starts from a copy of an existing macro table, e.g. the one shared by all pages."""
+        self.macros = dict(macros)
+        self.defined_symbols = set(macros)
+        self._macro_call_re = None
+
+    def collect_site_macros(self, pages: List[Tuple[str, str]], base_dir: str) -> Dict[str, Macro]:
+        """
+        Serial first pass over all pages in walk order, collecting every #define of the
+        pages and their includes into the one macro table all pages are rendered with.
+        The table is reused while the pages and every file the pass read are unchanged.
+        """
+        page_paths = [source_path for source_path, _ in pages]
+        cached = self._site_macros
+        if (cached is not None and cached.pages == page_paths and
+                all(self.source_digest(path) == digest
+                    for path, digest in cached.dependencies.items())):
+            return cached.macros
+        
+        self.load_macros({})
+        self._sources = {}
+        self.dependencies = {}
+        complete = True
+        for source_path in page_paths:
+            try:
+                content = self.read_source(source_path)
+                self.collect_macros(self.tokenize(content, source_path), base_dir)
+            except Exception:
+                complete = False  # Reported when the page itself is rendered
+        
+        macros = dict(self.macros)
+        # A pass that hit an error may not have read everything it depends on
+        self._site_macros = CachedMacros(page_paths, dict(self.dependencies), macros) if complete else None
+        return macros
+
+    def process_file(self, filepath: str, base_dir: str) -> str:
+        self._sources = {}
+        self.dependencies = {}
+        content = self.read_source(filepath)
         tokens = self.tokenize(content, filepath)
+        
+        # Collect the page's own and included macros first, and tokenize again if that
+        # defined anything new, so multi-line calls to those macros are recognised
+        known_macros = set(self.macros)
+        self.collect_macros(tokens, base_dir)
+        if not known_macros.issuperset(self.macros):
+            tokens = self.tokenize(content, filepath)
         return self.process_tokens(tokens, base_dir)
 
+    def get_executor(self) -> ProcessPoolExecutor:
+        """
+        Returns the worker pool, started once and reused across builds. Workers are
+        started through a forkserver (spawn where unavailable) rather than forked from
+        this process, which may be running watcher threads.
+        """
+        if self._executor is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self._executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context(method))
+        return self._executor
+
+    def close(self) -> None:
+        """Shuts down the worker pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def render_pages(self, pages: List[Tuple[str, str]], source_dir: str, built_paths: Set[str]) -> None:
+        """
+        Renders (source_path, build_path) pages. Pages whose source, includes and
+        shared macro table are unchanged since the last build reuse their cached
+        output; the rest are rendered in parallel worker processes.
+        """
+        macros = self.collect_site_macros(pages, source_dir)
+        macros_key = macros_digest(macros)
+        
+        # Forget pages that no longer exist
+        for source_path in self._render_cache.keys() - {source_path for source_path, _ in pages}:
+            del self._render_cache[source_path]
+        
+        pending = []
+        for source_path, build_path in pages:
+            cached = self._render_cache.get(source_path)
+            if (cached is not None and cached.macros_key == macros_key and
+                    all(self.source_digest(path) == digest
+                        for path, digest in cached.dependencies.items())):
+                # Only compare contents when the build file isn't the one we last wrote
+                if self.build_state(build_path) != cached.build_state:
+                    self.write_if_changed(build_path, cached.output)
+                    cached.build_state = self.build_state(build_path)
+            else:
+                pending.append((source_path, build_path))
+        
+        source_paths = [source_path for source_path, _ in pending]
+        results = None
+        if len(pending) > 1:
+            # The macro table goes with each chunk of pages, pickled once per chunk
+            chunksize = max(1, len(pending) // (4 * (os.cpu_count() or 1)))
+            try:
+                results = list(self.get_executor().map(
+                    render_page, source_paths, [source_dir] * len(pending), [macros] * len(pending),
+                    chunksize=chunksize
+                ))
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool next build and render this one here
+                self.close()
+        if results is None:
+            # A single page isn't worth a round trip to the workers
+            results = [render_page(source_path, source_dir, macros) for source_path in source_paths]
+        
+        for (source_path, build_path), (output, dependencies, error) in zip(pending, results):
+            if output is None:
+                print(f"Error processing {source_path}:")
+                print(f"  {error}")
+                # Don't leave the last good output of a failing page behind
+                built_paths.discard(os.path.normpath(build_path))
+                continue
+            self.write_if_changed(build_path, output)
+            self._render_cache[source_path] = CachedRender(
+                macros_key, dependencies, output, self.build_state(build_path)
+            )
+
+    def is_stale(self, source_path: str, build_path: str) -> bool:
+        """Checks whether a copied build file is missing or older than its source."""
+        try:
+            source_stat = os.stat(source_path)
+            build_stat = os.stat(build_path)
+        except FileNotFoundError:
+            return True
+        return (source_stat.st_size != build_stat.st_size or
+                source_stat.st_mtime_ns > build_stat.st_mtime_ns)
+
+    def build_state(self, build_path: str) -> Optional[Tuple[int, int]]:
+        """Returns the (mtime_ns, size) of a build file, or None if it is missing."""
+        try:
+            st = os.stat(build_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def write_if_changed(self, build_path: str, content: str) -> None:
+        """Writes a build file unless it already holds exactly this content."""
+        try:
+            with open(build_path, 'r', encoding='utf-8') as f:
+                if f.read() == content:
+                    return
+        except (OSError, UnicodeDecodeError):
+            pass
+        with open(build_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def remove_orphans(self, built_paths: Set[str]) -> None:
+        """Removes build files whose source no longer exists, and any directories left empty."""
+        for root, dirs, files in os.walk(self.build_dir, topdown=False):
+            for file in files:
+                build_path = os.path.normpath(os.path.join(root, file))
+                if build_path not in built_paths:
+                    os.remove(build_path)
+            if root != self.build_dir and not os.listdir(root):
+                os.rmdir(root)
+
     def generate_site(self, source_dir: str = ".") -> None:
-        if os.path.exists(self.build_dir):
-            shutil.rmtree(self.build_dir)
-        os.makedirs(self.build_dir)
+        # Sync into the existing build directory rather than rebuilding it from scratch
+        os.makedirs(self.build_dir, exist_ok=True)
+        self._source_digests = {}
+        built_paths: Set[str] = set()
+        pages: List[Tuple[str, str]] = []
         
         for root, _, files in os.walk(source_dir):
             if self.build_dir in root.split(os.sep):
                 continue
+            
+            # Path work shared by every file in this directory is done once
+            build_root = os.path.normpath(os.path.join(self.build_dir, os.path.relpath(root, source_dir)))
+            build_root_created = False
                 
             for file in files:
                 if file.endswith('.py'):
                     continue
                     
                 source_path = os.path.join(root, file)
-                rel_path = os.path.relpath(source_path, source_dir)
-                build_path = os.path.join(self.build_dir, rel_path)
+                build_path = os.path.join(build_root, file)
+                built_paths.add(build_path)
                 
-                os.makedirs(os.path.dirname(build_path), exist_ok=True)
+                if not build_root_created:
+                    os.makedirs(build_root, exist_ok=True)
+                    build_root_created = True
 
                 if not file.endswith('.html'):
-                    shutil.copy(source_path, build_path)
+                    if self.is_stale(source_path, build_path):
+                        shutil.copy(source_path, build_path)
                 else:
-                    try:
-                        processed_content = self.process_file(source_path, source_dir)
-                        with open(build_path, 'w', encoding='utf-8') as f:
-                            f.write(processed_content)
-                    except Exception as e:
-                        print(f"Error processing {source_path}:")
-                        print(f"  {str(e)}")
-
-def main():
+                    pages.append((source_path, build_path))
+        
+        self.render_pages(pages, source_dir, built_paths)
+        self.remove_orphans(built_paths)
+
+def macros_digest(macros: Dict[str, Macro]) -> str:
+    """Digest of a macro table, used to key cached renders."""
+    state = [(m.name, m.params, m.body) for m in macros.values()]
+    return hashlib.blake2b(repr(state).encode('utf-8')).hexdigest()
+
+def render_page(filepath: str, base_dir: str,
+                macros: Dict[str, Macro]) -> Tuple[Optional[str], Dict[str, str], Optional[str]]:
+    """
+    Renders one page in a fresh Preprocessor seeded with the shared macro table.
+    Runs in worker processes, so failures are returned as (None, {}, message)
+    instead of raised.
+    """
+    preprocessor = Preprocessor()
+    preprocessor.load_macros(macros)
+    try:
+        output = preprocessor.process_file(filepath, base_dir)
+    except Exception as e:
+        return None, {}, str(e)
+    return output, preprocessor.dependencies, None
+
+def main() -> None:
     print("C-Style Macro Static Site Generator")
     print("==================================")
     
@@ -339,6 +642,8 @@ def main():
     except Exception as e:
         print(f"Fatal error: {str(e)}")
         exit(1)
+    finally:
+        preprocessor.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
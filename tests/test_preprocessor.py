@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from static_site_generator_machine import Preprocessor
+
+
+class MacroExpansionTest(unittest.TestCase):
+    def render(self, source: str) -> str:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'page.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(source)
+            return Preprocessor().process_file(path, tmp)
+
+    def test_nested_calls_expand(self):
+        source = (
+            '#define btn(x) (<b>{x}</b>)\n'
+            '#define card(x) (<div>{x}</div>)\n'
+            'card(btn(a))\n'
+        )
+        self.assertEqual(self.render(source), '<div><b>a</b></div>')
+
+    def test_own_name_in_body_is_left_as_text(self):
+        source = (
+            '#define price(x) (<span>price (USD): {x}</span>)\n'
+            'price(5)\n'
+        )
+        self.assertEqual(self.render(source), '<span>price (USD): 5</span>')
+
+    def test_own_name_in_argument_is_left_as_text(self):
+        source = (
+            '#define card(x) (<div>{x}</div>)\n'
+            'card(see card (below))\n'
+        )
+        self.assertEqual(self.render(source), '<div>see card (below)</div>')
+
+
+if __name__ == '__main__':
+    unittest.main()